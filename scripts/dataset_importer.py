@@ -4,10 +4,62 @@ Data processing utilities for the trading suite.
 Handles importing and reformatting external CSV data.
 """
 
+import numpy as np
 import pandas as pd
 import os
 from datetime import datetime
 
+# Suffixes investing.com uses for abbreviated volumes
+VOLUME_MULTIPLIERS = {"B": 1000000000, "M": 1000000, "K": 1000}
+
+
+def _to_float_strings(values: np.ndarray, index: pd.Index) -> pd.Series:
+    """Format numbers like str(float), for a whole array at once."""
+    return pd.Series(values.astype(str), index=index)
+
+
+def clean_numeric_column(values: pd.Series) -> pd.Series:
+    """
+    Clean a price column: remove commas and convert to float, then back to string.
+
+    Args:
+        values: Column as read from the CSV (text, or numbers pandas already parsed)
+
+    Returns:
+        Column of number strings
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return _to_float_strings(values.to_numpy(), values.index)
+
+    # Casting text to float64 parses each value exactly like float()
+    text = values.str.replace(",", "", regex=False)
+    return _to_float_strings(
+        text.to_numpy(dtype=object).astype(np.float64), values.index
+    )
+
+
+def clean_volume_column(volume: pd.Series) -> pd.Series:
+    """
+    Clean a volume column: expand 'B', 'M' and 'K' suffixes and remove commas.
+
+    Args:
+        volume: Column as read from the CSV (text like "5.23M", or numbers)
+
+    Returns:
+        Column of number strings
+    """
+    if pd.api.types.is_numeric_dtype(volume):
+        return _to_float_strings(volume.to_numpy(), volume.index)
+
+    text = volume.str.replace(",", "", regex=False)  # Remove commas first
+    multipliers = text.str[-1].map(VOLUME_MULTIPLIERS)
+    has_suffix = multipliers.notna().to_numpy()
+
+    numbers = text.where(~has_suffix, text.str[:-1])
+    numbers = numbers.to_numpy(dtype=object).astype(np.float64)
+    numbers[has_suffix] *= multipliers.to_numpy(dtype=np.float64)[has_suffix]
+    return _to_float_strings(numbers, volume.index)
+
 
 def process_investing_csv(input_path: str, output_path: str, ticker: str):
     """
@@ -27,32 +79,12 @@ def process_investing_csv(input_path: str, output_path: str, ticker: str):
     # Convert date format from MM/DD/YYYY to YYYY-MM-DD
     df["Date"] = pd.to_datetime(df["Date"], format="%m/%d/%Y").dt.strftime("%Y-%m-%d")
 
-    # Clean numeric columns (remove commas and convert to float, then back to string)
-    def clean_numeric(value):
-        if isinstance(value, str):
-            # Remove commas and convert to float then back to string
-            return str(float(value.replace(",", "")))
-        return str(value)
-
     # Clean price columns
     for col in ["Close", "Open", "High", "Low"]:
-        df[col] = df[col].apply(clean_numeric)
+        df[col] = clean_numeric_column(df[col])
 
     # Clean volume column (remove 'M', 'K', 'B', convert to float, then back to string)
-    def clean_volume(vol):
-        if isinstance(vol, str):
-            vol = vol.replace(",", "")  # Remove commas first
-            if vol.endswith("B"):
-                return str(float(vol[:-1]) * 1000000000)
-            elif vol.endswith("M"):
-                return str(float(vol[:-1]) * 1000000)
-            elif vol.endswith("K"):
-                return str(float(vol[:-1]) * 1000)
-            else:
-                return str(float(vol))
-        return str(vol)
-
-    df["Volume"] = df["Volume"].apply(clean_volume)
+    df["Volume"] = clean_volume_column(df["Volume"])
 
     # Sort by date ascending
     df = df.sort_values("Date").reset_index(drop=True)
@@ -113,32 +145,12 @@ def process_investing_csv_to_df(input_path: str, ticker: str) -> pd.DataFrame:
     # Convert date format from MM/DD/YYYY to YYYY-MM-DD
     df["Date"] = pd.to_datetime(df["Date"], format="%m/%d/%Y").dt.strftime("%Y-%m-%d")
 
-    # Clean numeric columns (remove commas and convert to float, then back to string)
-    def clean_numeric(value):
-        if isinstance(value, str):
-            # Remove commas and convert to float then back to string
-            return str(float(value.replace(",", "")))
-        return str(value)
-
     # Clean price columns
     for col in ["Close", "Open", "High", "Low"]:
-        df[col] = df[col].apply(clean_numeric)
+        df[col] = clean_numeric_column(df[col])
 
     # Clean volume column (remove 'M', 'K', 'B', convert to float, then back to string)
-    def clean_volume(vol):
-        if isinstance(vol, str):
-            vol = vol.replace(",", "")  # Remove commas first
-            if vol.endswith("B"):
-                return str(float(vol[:-1]) * 1000000000)
-            elif vol.endswith("M"):
-                return str(float(vol[:-1]) * 1000000)
-            elif vol.endswith("K"):
-                return str(float(vol[:-1]) * 1000)
-            else:
-                return str(float(vol))
-        return str(vol)
-
-    df["Volume"] = df["Volume"].apply(clean_volume)
+    df["Volume"] = clean_volume_column(df["Volume"])
 
     # Sort by date ascending
     df = df.sort_values("Date").reset_index(drop=True)
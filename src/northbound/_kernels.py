@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Compiled numeric kernels for the backtesting engine.
+Uses numba when it is installed, otherwise the kernels run as plain Python.
+"""
+
+import numpy as np
+
+try:
+    from numba import njit
+except ImportError:
+
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit when numba is not installed."""
+        if len(args) == 1 and callable(args[0]) and not kwargs:
+            return args[0]
+        return lambda func: func
+
+
+# Operator codes for encoded rule conditions
+OP_GT = 0
+OP_LT = 1
+OP_GE = 2
+OP_LE = 3
+OP_EQ = 4
+
+OPERATOR_CODES = {">": OP_GT, "<": OP_LT, ">=": OP_GE, "<=": OP_LE, "==": OP_EQ}
+
+
+@njit(cache=True)
+def rolling_mean(close, period):
+    """
+    Simple moving average over the whole series in a single pass.
+
+    Keeps a running sum (add the newest price, subtract the oldest) with
+    separate Kahan compensation for additions and removals, following
+    pandas' rolling mean so results are bit-for-bit identical to
+    Series.rolling(period).mean().
+
+    Args:
+        close: float64 array of closing prices
+        period: Window length
+
+    Returns:
+        float64 array of moving averages, NaN until the window is full
+    """
+    num_days = close.shape[0]
+    result = np.full(num_days, np.nan)
+    total = 0.0
+    compensation_add = 0.0
+    compensation_remove = 0.0
+    num_obs = 0
+    num_negative = 0
+    num_same = 0  # Length of the current run of identical values
+    prev_value = np.nan
+
+    for day in range(num_days):
+        if day >= period:
+            value = close[day - period]
+            if not np.isnan(value):
+                num_obs -= 1
+                y = -value - compensation_remove
+                t = total + y
+                compensation_remove = t - total - y
+                total = t
+                if np.signbit(value):
+                    num_negative -= 1
+
+        value = close[day]
+        if not np.isnan(value):
+            num_obs += 1
+            y = value - compensation_add
+            t = total + y
+            compensation_add = t - total - y
+            total = t
+            if np.signbit(value):
+                num_negative += 1
+            if value == prev_value:
+                num_same += 1
+            else:
+                num_same = 1
+            prev_value = value
+
+        if num_obs >= period:
+            mean = total / num_obs
+            if num_same >= num_obs:
+                mean = prev_value  # Constant window, avoid rounding drift
+            elif num_negative == 0 and mean < 0:
+                mean = 0.0
+            elif num_negative == num_obs and mean > 0:
+                mean = 0.0
+            result[day] = mean
+
+    return result
+
+
+@njit(cache=True)
+def ewm_mean(close, span):
+    """
+    Exponential moving average over the whole series in a single pass.
+
+    Follows pandas' recursive (adjust=False) weighting so results are
+    bit-for-bit identical to Series.ewm(span=span, adjust=False).mean().
+
+    Args:
+        close: float64 array of closing prices
+        span: EMA span
+
+    Returns:
+        float64 array of exponential moving averages
+    """
+    num_days = close.shape[0]
+    result = np.full(num_days, np.nan)
+    if num_days == 0:
+        return result
+
+    alpha = 1.0 / (1.0 + (span - 1.0) / 2.0)
+    old_weight = 1.0 - alpha
+    weighted = close[0]
+    result[0] = weighted
+
+    for day in range(1, num_days):
+        value = close[day]
+        if not np.isnan(weighted):
+            # A constant series keeps its exact value
+            if not np.isnan(value) and weighted != value:
+                weighted = (old_weight * weighted + alpha * value) / (
+                    old_weight + alpha
+                )
+        elif not np.isnan(value):
+            weighted = value
+        result[day] = weighted
+
+    return result
+
+
+@njit(cache=True)
+def ma_deviation(close, average, warmup):
+    """
+    Relative deviation of price from a moving average: (close - MA) / MA.
+
+    Args:
+        close: float64 array of closing prices
+        average: float64 array of moving averages (same length as close)
+        warmup: Number of leading days without enough data
+
+    Returns:
+        float64 array of deviations, NaN for the first `warmup` days
+    """
+    num_days = close.shape[0]
+    result = np.empty(num_days)
+    for day in range(num_days):
+        if day < warmup:
+            result[day] = np.nan
+        else:
+            result[day] = (close[day] - average[day]) / average[day]
+    return result
+
+
+@njit(cache=True)
+def evaluate_rules_kernel(
+    indicator_matrix, op_codes, thresholds, calc_idx, rule_starts, logic_is_and
+):
+    """
+    Find the first triggered rule for every day.
+
+    Rules are stored CSR-style: the conditions of rule r are the entries
+    rule_starts[r]:rule_starts[r + 1] of op_codes, thresholds and calc_idx.
+
+    Args:
+        indicator_matrix: (num_calculations, num_days) indicator values, NaN
+            where there is not enough data
+        op_codes: Operator code per condition (OP_GT, OP_LT, ...)
+        thresholds: Threshold per condition
+        calc_idx: Row of indicator_matrix per condition
+        rule_starts: Offset of each rule's first condition (num_rules + 1)
+        logic_is_and: True for AND rules, False for OR rules
+
+    Returns:
+        int32 array with the triggered rule index per day (-1 for none)
+    """
+    num_days = indicator_matrix.shape[1]
+    num_rules = logic_is_and.shape[0]
+    active_rule = np.full(num_days, -1, dtype=np.int32)
+
+    for day in range(num_days):
+        for rule in range(num_rules):
+            is_and = logic_is_and[rule]
+            triggered = is_and
+
+            for cond in range(rule_starts[rule], rule_starts[rule + 1]):
+                value = indicator_matrix[calc_idx[cond], day]
+                threshold = thresholds[cond]
+                op = op_codes[cond]
+
+                if np.isnan(value):
+                    result = False  # Not enough data
+                elif op == OP_GT:
+                    result = value > threshold
+                elif op == OP_LT:
+                    result = value < threshold
+                elif op == OP_GE:
+                    result = value >= threshold
+                elif op == OP_LE:
+                    result = value <= threshold
+                else:
+                    result = abs(value - threshold) < 1e-6
+
+                # Stop as soon as the rule's outcome is known
+                if is_and and not result:
+                    triggered = False
+                    break
+                if not is_and and result:
+                    triggered = True
+                    break
+
+            if triggered:
+                active_rule[day] = rule
+                break
+
+    return active_rule
+
+
+@njit(cache=True)
+def compound_portfolio(initial_value, contributions, daily_returns):
+    """
+    Compound a portfolio through daily returns, adding contributions first.
+
+    Args:
+        initial_value: Portfolio value before the first day
+        contributions: Money added at the start of each day (0 on most days)
+        daily_returns: Portfolio return of each day as a decimal
+
+    Returns:
+        float64 array with the portfolio value at the end of each day
+    """
+    num_days = daily_returns.shape[0]
+    values = np.empty(num_days)
+    value = initial_value
+
+    for day in range(num_days):
+        value += contributions[day]
+        value *= 1.0 + daily_returns[day]
+        values[day] = value
+
+    return values
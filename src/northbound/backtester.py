@@ -3,11 +3,82 @@
 Backtesting engine for trading strategies.
 """
 
+import hashlib
 import json
 import os
+import numpy as np
 import pandas as pd
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Optional
+
+from ._kernels import (
+    OPERATOR_CODES,
+    compound_portfolio,
+    evaluate_rules_kernel,
+    ewm_mean,
+    ma_deviation,
+    rolling_mean,
+)
+
+# The simulation only reads these columns; skip parsing the rest of each CSV
+PRICE_COLUMNS = ["Date", "Close"]
+
+
+class _PriceSeries:
+    """Close prices usable as a cache key, hashed and compared by content."""
+
+    __slots__ = ("values", "_digest")
+
+    def __init__(self, values: np.ndarray):
+        self.values = values
+        self._digest = hashlib.blake2b(values.tobytes(), digest_size=16).digest()
+
+    def __hash__(self) -> int:
+        return hash(self._digest)
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, _PriceSeries)
+            and self._digest == other._digest
+            and self.values.shape == other.values.shape
+        )
+
+
+@lru_cache(maxsize=32)
+def _indicator_array(calc_type: str, period: int, prices: _PriceSeries) -> np.ndarray:
+    """
+    Calculate an indicator over a whole price series (NaN where not enough data).
+
+    Cached by price content, so backtests of different strategies on the same
+    underlying share indicators with the same type and period. The returned
+    array is read-only.
+    """
+    close = prices.values
+
+    if calc_type == "SMA":
+        # Deviation from SMA: (current - SMA) / SMA
+        values = ma_deviation(close, rolling_mean(close, period), period - 1)
+
+    elif calc_type == "EMA":
+        # Deviation from EMA: (current - EMA) / EMA
+        values = ma_deviation(close, ewm_mean(close, period), period - 1)
+
+    elif calc_type == "RSI":
+        # Same steps as IndicatorCalculator.calculate_rsi, with the
+        # compiled rolling mean
+        delta = np.diff(close, prepend=np.nan)
+        gain = rolling_mean(np.where(delta > 0, delta, 0.0), period)
+        loss = rolling_mean(-np.where(delta < 0, delta, 0.0), period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - (100 / (1 + gain / loss))
+        values = np.where(np.arange(len(close)) < period, np.nan, rsi)
+
+    else:
+        raise ValueError(f"Unsupported calculation type: {calc_type}")
+
+    values.flags.writeable = False
+    return values
 
 
 class IndicatorCalculator:
@@ -41,7 +112,55 @@ class RuleEngine:
         self.config = config
         self.underlying_symbol = config["underlying_symbol"]
         self.calculations = config.get("calculations", [])  # Multiple calculations
+        self.calculations_by_name = {calc["name"]: calc for calc in self.calculations}
         self.rules = config["rules"]
+        self.rule_allocations = [
+            self._parse_allocation(rule.get("ticker")) for rule in self.rules
+        ]
+        self._encode_rules()
+
+    def _encode_rules(self) -> None:
+        """Encode condition rules as flat arrays for evaluate_rules_kernel."""
+        calc_names = []  # Calculations referenced by any condition
+        rule_ids = []
+        rule_starts = [0]
+        logic_is_and = []
+        op_codes = []
+        thresholds = []
+        calc_idx = []
+
+        for rule_id, rule in enumerate(self.rules):
+            if "conditions" not in rule:
+                continue  # Skip legacy rules
+
+            logic = rule.get("logic", "AND")
+            if logic not in ("AND", "OR"):
+                raise ValueError(f"Unsupported logic: {logic}")
+
+            for condition in rule["conditions"]:
+                operator = condition["operator"]
+                if operator not in OPERATOR_CODES:
+                    raise ValueError(f"Unsupported operator: {operator}")
+
+                calc_name = condition["calculation"]
+                if calc_name not in calc_names:
+                    calc_names.append(calc_name)
+
+                op_codes.append(OPERATOR_CODES[operator])
+                thresholds.append(condition["threshold"])
+                calc_idx.append(calc_names.index(calc_name))
+
+            rule_ids.append(rule_id)
+            rule_starts.append(len(op_codes))
+            logic_is_and.append(logic == "AND")
+
+        self.kernel_calc_names = calc_names
+        self.kernel_rule_ids = np.array(rule_ids, dtype=np.int32)
+        self.kernel_rule_starts = np.array(rule_starts, dtype=np.int32)
+        self.kernel_logic_is_and = np.array(logic_is_and, dtype=np.bool_)
+        self.kernel_op_codes = np.array(op_codes, dtype=np.int8)
+        self.kernel_thresholds = np.array(thresholds, dtype=np.float64)
+        self.kernel_calc_idx = np.array(calc_idx, dtype=np.int32)
 
     def evaluate_rules(self, data: pd.DataFrame, date_idx: int) -> Dict[str, float]:
         """
@@ -53,18 +172,122 @@ class RuleEngine:
             date_idx: Index of current date in data
 
         Returns:
-            Dict of ticker -> percentage allocation
+            Dict of ticker -> percentage allocation (shared, must not be modified)
+        """
+        return self.evaluate_rules_array(
+            data["Close"].to_numpy(dtype=np.float64), date_idx
+        )
+
+    def evaluate_rules_array(
+        self, close: np.ndarray, date_idx: int
+    ) -> Dict[str, float]:
+        """
+        Evaluate rules for a given date from a preconverted close price array.
+
+        Callers evaluating many dates should convert the Close column once and
+        call this directly, avoiding per-day DataFrame slicing.
+
+        Args:
+            close: float64 array of closing prices
+            date_idx: Index of current date in close
+
+        Returns:
+            Dict of ticker -> percentage allocation (shared with other calls
+            that pick the same rule, must not be modified)
         """
         # Handle multi-condition format
         if self.calculations:
-            return self._evaluate_multi_condition_rules(data, date_idx)
+            return self._evaluate_multi_condition_rules(close, date_idx)
 
         # Buy-and-hold style (no calculations)
         if self.rules:
-            rule = self.rules[0]
-            return self._parse_allocation(rule.get("ticker"))
+            return self.rule_allocations[0]
         return {}
 
+    def evaluate_all(self, data: pd.DataFrame) -> List[Dict[str, float]]:
+        """
+        Evaluate rules for every date in data at once.
+
+        Equivalent to calling evaluate_rules for each index, but indicators are
+        calculated once over the whole series and rules are evaluated for all
+        days by evaluate_rules_kernel.
+
+        Args:
+            data: DataFrame with price data
+
+        Returns:
+            List of ticker -> percentage allocation dicts, one per row of data
+            (shared between rows with the same rule, must not be modified)
+        """
+        return self.allocations_for(self.evaluate_all_rules(data))
+
+    def evaluate_all_rules(self, data: pd.DataFrame) -> np.ndarray:
+        """
+        Find the triggered rule for every date in data at once.
+
+        Args:
+            data: DataFrame with price data
+
+        Returns:
+            int32 array with the index into self.rules per row of data
+            (-1 where no rule is triggered)
+        """
+        num_days = len(data)
+
+        # Buy-and-hold style (no calculations)
+        if not self.calculations:
+            return np.full(num_days, 0 if self.rules else -1, dtype=np.int32)
+
+        # One row per referenced calculation, NaN where there is not enough data
+        prices = _PriceSeries(data["Close"].to_numpy(dtype=np.float64))
+        indicator_matrix = np.empty(
+            (len(self.kernel_calc_names), num_days), dtype=np.float64
+        )
+        for row, calc_name in enumerate(self.kernel_calc_names):
+            indicator_matrix[row] = self._calculate_indicator_array(
+                self.calculations_by_name[calc_name], prices
+            )
+
+        # Index of the first triggered rule for each day (-1 for none)
+        active_rule = evaluate_rules_kernel(
+            indicator_matrix,
+            self.kernel_op_codes,
+            self.kernel_thresholds,
+            self.kernel_calc_idx,
+            self.kernel_rule_starts,
+            self.kernel_logic_is_and,
+        )
+
+        # Map encoded rule indices back to rule indices (the extra entry
+        # keeps -1 as -1)
+        rule_ids = np.append(self.kernel_rule_ids, np.int32(-1))
+        return rule_ids[active_rule]
+
+    def allocations_for(self, rule_indices: np.ndarray) -> List[Dict[str, float]]:
+        """
+        Convert rule indices from evaluate_all_rules into allocation dicts.
+
+        Args:
+            rule_indices: Index into self.rules per day (-1 for none)
+
+        Returns:
+            List of ticker -> percentage allocation dicts, one per day. Days
+            with the same rule share one dict, which must not be modified.
+        """
+        # One allocation per rule plus an empty one at the end for index -1
+        choices = np.empty(len(self.rule_allocations) + 1, dtype=object)
+        choices[:-1] = self.rule_allocations
+        choices[-1] = {}
+        return choices[rule_indices].tolist()
+
+    def _calculate_indicator_array(
+        self, calc: Dict[str, Any], prices: _PriceSeries
+    ) -> np.ndarray:
+        """Calculate an indicator over the whole series (NaN where not enough data)."""
+        calc_type = calc["type"]
+        period = calc.get("period", 14) if calc_type == "RSI" else calc.get("period")
+        return _indicator_array(calc_type, period, prices)
+
     def _evaluate_legacy_rules(
         self, data: pd.DataFrame, date_idx: int
     ) -> Dict[str, float]:
@@ -134,105 +357,83 @@ class RuleEngine:
         return {}
 
     def _evaluate_multi_condition_rules(
-        self, data: pd.DataFrame, date_idx: int
+        self, close: np.ndarray, date_idx: int
     ) -> Dict[str, float]:
         """Evaluate rules using new multi-condition format."""
-        current_price = data["Close"].iloc[date_idx]
-
-        # Calculate all indicators
+        # Indicators are calculated lazily, only once a rule actually needs them
         indicators = {}
-        for calc in self.calculations:
-            calc_name = calc["name"]
-            calc_type = calc["type"]
-
-            if calc_type == "SMA":
-                period = calc["period"]
-                if date_idx < period - 1:
-                    indicators[calc_name] = None  # Not enough data
-                    continue
-
-                prices = data["Close"][: date_idx + 1]
-                sma_value = IndicatorCalculator.calculate_sma(prices, period).iloc[-1]
-                # Calculate deviation from SMA: (current - SMA) / SMA
-                indicators[calc_name] = (current_price - sma_value) / sma_value
-
-            elif calc_type == "EMA":
-                period = calc["period"]
-                if date_idx < period - 1:
-                    indicators[calc_name] = None  # Not enough data
-                    continue
-
-                prices = data["Close"][: date_idx + 1]
-                ema_value = IndicatorCalculator.calculate_ema(prices, period).iloc[-1]
-                # Calculate deviation from EMA: (current - EMA) / EMA
-                indicators[calc_name] = (current_price - ema_value) / ema_value
-
-            elif calc_type == "RSI":
-                period = calc.get("period", 14)
-                if date_idx < period:
-                    indicators[calc_name] = None
-                    continue
-
-                prices = data["Close"][: date_idx + 1]
-                indicators[calc_name] = IndicatorCalculator.calculate_rsi(
-                    prices, period
-                ).iloc[-1]
-
-            else:
-                raise ValueError(f"Unsupported calculation type: {calc_type}")
+        prices = None
+
+        def get_indicator(calc_name: str):
+            nonlocal prices
+            if calc_name not in indicators:
+                if prices is None:
+                    prices = _PriceSeries(close)
+                indicators[calc_name] = self._calculate_indicator(
+                    self.calculations_by_name[calc_name], prices, date_idx
+                )
+            return indicators[calc_name]
 
         # Evaluate rules with conditions
-        for rule in self.rules:
+        for rule_idx, rule in enumerate(self.rules):
             if "conditions" not in rule:
                 continue  # Skip legacy rules
 
             conditions = rule["conditions"]
             logic = rule.get("logic", "AND")
 
-            # Evaluate all conditions
-            condition_results = []
-            for condition in conditions:
-                calc_name = condition["calculation"]
-                operator = condition["operator"]
-                threshold = condition["threshold"]
-
-                if indicators[calc_name] is None:
-                    condition_results.append(False)  # Not enough data
-                    continue
-
-                indicator_value = indicators[calc_name]
-
-                # Evaluate condition
-                if operator == ">":
-                    result = indicator_value > threshold
-                elif operator == "<":
-                    result = indicator_value < threshold
-                elif operator == ">=":
-                    result = indicator_value >= threshold
-                elif operator == "<=":
-                    result = indicator_value <= threshold
-                elif operator == "==":
-                    result = (
-                        abs(indicator_value - threshold) < 1e-6
-                    )  # Floating point comparison
-                else:
-                    raise ValueError(f"Unsupported operator: {operator}")
-
-                condition_results.append(result)
-
-            # Combine conditions with logic
+            # Evaluate conditions, stopping as soon as the outcome is known
             if logic == "AND":
-                rule_triggered = all(condition_results)
+                rule_triggered = all(
+                    self._evaluate_condition(condition, get_indicator)
+                    for condition in conditions
+                )
             elif logic == "OR":
-                rule_triggered = any(condition_results)
+                rule_triggered = any(
+                    self._evaluate_condition(condition, get_indicator)
+                    for condition in conditions
+                )
             else:
                 raise ValueError(f"Unsupported logic: {logic}")
 
             if rule_triggered:
-                return self._parse_allocation(rule.get("ticker"))
+                return self.rule_allocations[rule_idx]
 
         return {}
 
+    def _calculate_indicator(
+        self, calc: Dict[str, Any], prices: _PriceSeries, date_idx: int
+    ) -> Optional[float]:
+        """Calculate a single indicator value for a given date (None if not enough data)."""
+        # Indicators only look back, so the whole-series value at date_idx is
+        # the value for that day (and identical to evaluate_all_rules)
+        value = self._calculate_indicator_array(calc, prices)[date_idx]
+        if np.isnan(value):
+            return None  # Not enough data
+        return value
+
+    def _evaluate_condition(self, condition: Dict[str, Any], get_indicator) -> bool:
+        """Evaluate a single rule condition against its indicator value."""
+        operator = condition["operator"]
+        threshold = condition["threshold"]
+
+        indicator_value = get_indicator(condition["calculation"])
+        if indicator_value is None:
+            return False  # Not enough data
+
+        if operator == ">":
+            return indicator_value > threshold
+        elif operator == "<":
+            return indicator_value < threshold
+        elif operator == ">=":
+            return indicator_value >= threshold
+        elif operator == "<=":
+            return indicator_value <= threshold
+        elif operator == "==":
+            return abs(indicator_value - threshold) < 1e-6  # Floating point comparison
+        else:
+            raise ValueError(f"Unsupported operator: {operator}")
+
     def _parse_allocation(self, allocation_value) -> Dict[str, float]:
         """
         Parse allocation value into dictionary format.
@@ -320,9 +521,10 @@ class PortfolioSimulator:
 class Backtester:
     """Main backtesting engine."""
 
-    def __init__(self, config_path: str, data_dir: str = "data"):
+    def __init__(self, config_path: str, data_dir: str = "data", fp32: bool = False):
         self.config_path = config_path
         self.data_dir = data_dir
+        self.fp32 = fp32  # Opt in to float32 simulation prices (values stay float64)
         self.config = None
         self.rule_engine = None
         self.portfolio = None
@@ -490,7 +692,9 @@ class Backtester:
             self.data_dir, "real_tickers", f"{self.config['underlying_symbol']}.csv"
         )
         if os.path.exists(underlying_path):
-            data[self.config["underlying_symbol"]] = pd.read_csv(underlying_path)
+            data[self.config["underlying_symbol"]] = pd.read_csv(
+                underlying_path, usecols=PRICE_COLUMNS
+            )
         else:
             raise FileNotFoundError(f"Underlying data not found: {underlying_path}")
 
@@ -523,12 +727,40 @@ class Backtester:
                     self.data_dir, "real_tickers", f"{ticker}.csv"
                 )
                 if os.path.exists(ticker_path):
-                    data[ticker] = pd.read_csv(ticker_path)
+                    data[ticker] = pd.read_csv(ticker_path, usecols=PRICE_COLUMNS)
                 else:
                     print(f"Warning: Data not found for {ticker}, skipping")
 
         return data
 
+    @staticmethod
+    def _align_dates(source_dates: pd.Series, target_dates: np.ndarray) -> np.ndarray:
+        """
+        Map each target date to its row position in source_dates.
+
+        Args:
+            source_dates: Date column to look dates up in (YYYY-MM-DD)
+            target_dates: datetime64[D] dates to look up
+
+        Returns:
+            Array of row positions into source_dates (-1 where the date is missing)
+        """
+        # datetime64 sorts and compares as integers, much faster than strings
+        source = source_dates.to_numpy().astype("datetime64[D]")
+        if len(source) == 0:
+            return np.full(len(target_dates), -1, dtype=np.int64)
+
+        # Sort once, then binary search every target date
+        order = np.argsort(source, kind="stable")
+        sorted_source = source[order]
+        positions = np.searchsorted(sorted_source, target_dates)
+
+        clipped = np.minimum(positions, len(sorted_source) - 1)
+        found = (positions < len(sorted_source)) & (
+            sorted_source[clipped] == target_dates
+        )
+        return np.where(found, order[clipped], -1)
+
     def run_simulation(
         self,
         start_date: str = None,
@@ -561,98 +793,134 @@ class Backtester:
 
         # Calculate strategy allocations with realistic timing
         # Decision made on day N uses data up to day N, applied on day N+1
-        strategy_results = []
-        for idx in range(len(underlying_data)):
-            current_date = underlying_data.iloc[idx]["Date"]
-
-            # Use data up to current date to make allocation decision
-            # This allocation will be applied on the NEXT trading day
-            target_allocation = self.rule_engine.evaluate_rules(underlying_data, idx)
-
-            strategy_result = {
-                "Date": current_date,  # Date when decision is made
-                "Allocation": target_allocation.copy(),  # Allocation for NEXT day
-            }
-
-            strategy_results.append(strategy_result)
+        # (indicators only look back, so evaluating all days at once is safe)
+        rule_indices = self.rule_engine.evaluate_all_rules(underlying_data)
+        allocations = self.rule_engine.allocations_for(rule_indices)
 
-        strategy_df = pd.DataFrame(strategy_results)
+        strategy_df = pd.DataFrame(
+            {"Date": underlying_data["Date"].to_numpy(), "Allocation": allocations}
+        )
 
-        # Filter for simulation date range
-        simulation_data = underlying_data.copy()
-        if start_date:
-            simulation_data = simulation_data[simulation_data["Date"] >= start_date]
-        if end_date:
-            simulation_data = simulation_data[simulation_data["Date"] <= end_date]
+        # Filter for simulation date range (ticker files are sorted by date,
+        # so the range is a contiguous slice found by binary search)
+        underlying_dates = underlying_data["Date"].to_numpy()
+        first_row = (
+            np.searchsorted(underlying_dates, start_date, side="left")
+            if start_date
+            else 0
+        )
+        last_row = (
+            np.searchsorted(underlying_dates, end_date, side="right")
+            if end_date
+            else len(underlying_dates)
+        )
 
-        simulation_data = simulation_data.reset_index(drop=True)
+        # Only the dates are needed, so no DataFrame copy is made
+        sim_dates = underlying_dates[first_row:last_row]
 
         # Run portfolio simulation with realistic execution timing
         # Initialize portfolio with DCA parameters
         self.portfolio = PortfolioSimulator(initial_capital, monthly_investment)
 
-        simulation_results = []
-        previous_prices = {}
-        current_month = None
-
-        for idx in range(len(simulation_data)):
-            current_date = simulation_data.iloc[idx]["Date"]
-            current_date_obj = pd.to_datetime(current_date)
-            month_key = f"{current_date_obj.year}-{current_date_obj.month:02d}"
-
-            # Get prices for all tickers on this date
-            current_prices = {}
-            for ticker, df in data.items():
-                date_row = df[df["Date"] == current_date]
-                if not date_row.empty:
-                    current_prices[ticker] = float(date_row["Close"].iloc[0])
+        # Map each simulation day to a row in every ticker (and in strategy_df)
+        # once up front, so per-day lookups are a single index
+        price_dtype = np.float32 if self.fp32 else np.float64
+        sim_days = sim_dates.astype("datetime64[D]")
+        ticker_columns = {
+            ticker: (
+                df["Close"].to_numpy(dtype=price_dtype),
+                self._align_dates(df["Date"], sim_days),
+            )
+            for ticker, df in data.items()
+        }
+        decision_rows = self._align_dates(strategy_df["Date"], sim_days)
+
+        num_sim_days = len(sim_dates)
+
+        # Days without a price for any ticker are skipped entirely
+        has_prices = np.zeros(num_sim_days, dtype=np.bool_)
+        for closes, rows in ticker_columns.values():
+            has_prices |= rows >= 0
+        recorded_days = np.flatnonzero(has_prices)
+        num_results = len(recorded_days)
+
+        # Each ticker's close-to-close return between consecutive recorded
+        # days (0 where either price is missing, or on the first day)
+        ticker_returns = {}
+        for ticker, (closes, rows) in ticker_columns.items():
+            if len(closes) == 0:
+                continue  # No prices at all, contributes no return
+
+            recorded_rows = rows[recorded_days]
+            prices = np.where(
+                recorded_rows >= 0,
+                closes[recorded_rows].astype(np.float64, copy=False),
+                np.nan,
+            )
+            previous = np.concatenate(([np.nan], prices[:-1]))
+            with np.errstate(divide="ignore", invalid="ignore"):
+                returns = (prices - previous) / previous
+            ticker_returns[ticker] = np.where(
+                np.isnan(returns) | (previous == 0), 0.0, returns
+            )
 
-            if not current_prices:
+        # Allocation decided on the PREVIOUS day (no look-ahead bias); the
+        # first day has no previous allocation
+        applied_rules = np.full(num_sim_days, -1, dtype=np.int32)
+        prev_rows = decision_rows[:-1]
+        applied_rules[1:] = np.where(prev_rows >= 0, rule_indices[prev_rows], -1)
+        applied_rules = applied_rules[recorded_days]
+
+        # Weighted daily return for all days sharing the same rule at once,
+        # summed in allocation order like calculate_daily_return
+        daily_returns = np.zeros(num_results, dtype=np.float64)
+        for rule_idx, allocation in enumerate(self.rule_engine.rule_allocations):
+            rule_days = applied_rules == rule_idx
+            if not rule_days.any():
                 continue
 
-            # DCA Logic: Add monthly investment on first trading day of each month
-            if self.portfolio.monthly_investment > 0 and month_key != current_month:
-                # This is the first trading day of a new month
-                self.portfolio.portfolio_value += self.portfolio.monthly_investment
-                self.portfolio.total_invested += self.portfolio.monthly_investment
-                current_month = month_key
-
-            # Get allocation made on the PREVIOUS day (no look-ahead bias)
-            date_allocation = {}
-            if idx > 0:  # First day has no previous allocation
-                prev_date = simulation_data.iloc[idx - 1]["Date"]
-                prev_date_row = strategy_df[strategy_df["Date"] == prev_date]
-                if not prev_date_row.empty:
-                    # Parse the JSON string back to dict
-                    alloc_str = prev_date_row["Allocation"].iloc[0]
-                    if isinstance(alloc_str, str):
-                        date_allocation = eval(alloc_str)
-                    else:
-                        date_allocation = alloc_str
-
-            # Calculate daily return using closing prices only
-            daily_return = self.portfolio.calculate_daily_return(
-                date_allocation, current_prices, previous_prices
-            )
+            rule_returns = np.zeros(np.count_nonzero(rule_days), dtype=np.float64)
+            for ticker, percentage in allocation.items():
+                if ticker in ticker_returns:
+                    rule_returns += ticker_returns[ticker][rule_days] * (
+                        percentage / 100
+                    )
+            daily_returns[rule_days] = rule_returns
+
+        result_dates = sim_dates[recorded_days]
+
+        # DCA Logic: Add monthly investment on first trading day of each month,
+        # found for all days at once from their month index
+        contributions = np.zeros(num_results, dtype=np.float64)
+        if self.portfolio.monthly_investment > 0 and num_results > 0:
+            result_months = sim_days[recorded_days].astype("datetime64[M]")
+            new_month = np.ones(num_results, dtype=np.bool_)
+            new_month[1:] = result_months[1:] != result_months[:-1]
+            contributions[new_month] = self.portfolio.monthly_investment
+
+        # Running totals, accumulated in the same order as day-by-day updates
+        total_invested = np.cumsum(
+            np.concatenate(([self.portfolio.total_invested], contributions))
+        )[1:]
+        portfolio_values = compound_portfolio(
+            self.portfolio.portfolio_value, contributions, daily_returns
+        )
 
-            # Update portfolio value
-            portfolio_value = self.portfolio.update_portfolio_value(daily_return)
+        if num_results > 0:
+            self.portfolio.portfolio_value = float(portfolio_values[-1])
+            self.portfolio.total_invested = float(total_invested[-1])
 
-            # Record results (include total invested for DCA tracking)
-            simulation_result = {
-                "Date": current_date,
+        simulation_df = pd.DataFrame(
+            {
+                "Date": result_dates,
                 "Strategy_Name": self.config["name"],
-                "Portfolio_Value": portfolio_value,
-                "Total_Invested": self.portfolio.total_invested,
-                "Daily_Return": daily_return,
+                "Portfolio_Value": portfolio_values,
+                "Total_Invested": total_invested,
+                "Daily_Return": daily_returns,
             }
+        )
 
-            simulation_results.append(simulation_result)
-
-            # Store current prices for next iteration
-            previous_prices = current_prices.copy()
-
-        return strategy_df, pd.DataFrame(simulation_results)
+        return strategy_df, simulation_df
 
     def save_results(
         self, results_tuple, strategy_path: str, simulation_path: str = None
@@ -666,15 +934,22 @@ class Backtester:
             simulation_df = None
 
         # Save strategy allocation data
-        strategy_output = strategy_df.copy()
-        strategy_output["Allocation"] = strategy_output["Allocation"].apply(json.dumps)
-        strategy_output.to_csv(strategy_path, index=False)
+        # Days on the same rule share one allocation dict, so each distinct
+        # dict is encoded only once
+        encoded = {}
+        allocation_text = []
+        for alloc in strategy_df["Allocation"]:
+            text = encoded.get(id(alloc))
+            if text is None:
+                text = encoded[id(alloc)] = json.dumps(alloc)
+            allocation_text.append(text)
+        strategy_output = strategy_df.assign(Allocation=allocation_text)
+        strategy_output.to_csv(strategy_path, index=False, lineterminator="\n")
         print(f"Strategy allocations saved to {strategy_path}")
 
         # Save simulation results (portfolio state) if path provided and data exists
         if simulation_path and simulation_df is not None:
-            simulation_output = simulation_df.copy()
-            simulation_output.to_csv(simulation_path, index=False)
+            simulation_df.to_csv(simulation_path, index=False, lineterminator="\n")
             print(f"Simulation results saved to {simulation_path}")
 
 
@@ -4,20 +4,36 @@ Data management utilities for the trading suite.
 Handles data backfilling using Polygon.io API.
 """
 
+import operator
 import os
+import numpy as np
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 POLYGON_API_KEY = os.getenv("POLYGON_API_KEY")
 
+# Record layout for aggregate bars returned by the Polygon SDK
+AGG_DTYPE = np.dtype(
+    [
+        ("timestamp", np.int64),
+        ("open", np.float64),
+        ("high", np.float64),
+        ("low", np.float64),
+        ("close", np.float64),
+        ("volume", np.float64),
+    ]
+)
+
 
 class PolygonClient:
     """Client for Polygon.io API using official SDK."""
 
-    def __init__(self, api_key: str):
+    def __init__(self, api_key: str, max_connections: int = 10):
         try:
             from polygon import RESTClient
 
@@ -27,6 +43,13 @@ class PolygonClient:
                 "polygon-api-client package required. Install with: pip install polygon-api-client"
             )
 
+        # The SDK's urllib3 PoolManager keeps one connection per host by
+        # default, so concurrent requests would discard their sockets and
+        # pay a new TLS handshake each time. Keep enough alive to reuse.
+        pool_manager = getattr(self.client, "client", None)
+        if hasattr(pool_manager, "connection_pool_kw"):
+            pool_manager.connection_pool_kw["maxsize"] = max_connections
+
     def get_aggregates(
         self,
         ticker: str,
@@ -34,7 +57,7 @@ class PolygonClient:
         to_date: str,
         multiplier: int = 1,
         timespan: str = "day",
-    ) -> pd.DataFrame:
+    ) -> Optional[pd.DataFrame]:
         """
         Get aggregate bars for a ticker using Polygon SDK.
 
@@ -46,7 +69,8 @@ class PolygonClient:
             timespan: Size of the time window (day, hour, minute, etc.)
 
         Returns:
-            DataFrame with OHLCV data
+            DataFrame with OHLCV data (empty if there are no bars), or None if
+            the request failed
         """
         try:
             # Use Polygon SDK to get aggregates
@@ -59,30 +83,32 @@ class PolygonClient:
                 limit=50000,  # Get plenty of data
             )
 
-            # Convert to DataFrame
-            data = []
-            for agg in aggs:
-                data.append(
-                    {
-                        "Date": pd.Timestamp.fromtimestamp(
-                            agg.timestamp / 1000
-                        ).strftime(
-                            "%Y-%m-%d"
-                        ),  # Convert from milliseconds
-                        "Open": agg.open,
-                        "High": agg.high,
-                        "Low": agg.low,
-                        "Close": agg.close,
-                        "Volume": agg.volume,
-                    }
-                )
-
-            df = pd.DataFrame(data)
-            if df.empty:
+            if not aggs:
                 print(f"No data returned from Polygon API for {ticker}")
                 return pd.DataFrame()
 
-            return df
+            # Read all fields in one pass into a structured array, then
+            # convert to DataFrame column by column
+            get_fields = operator.attrgetter(
+                "timestamp", "open", "high", "low", "close", "volume"
+            )
+            bars = np.fromiter(
+                (get_fields(agg) for agg in aggs), dtype=AGG_DTYPE, count=len(aggs)
+            )
+
+            # Timestamps are milliseconds since epoch
+            dates = pd.to_datetime(bars["timestamp"], unit="ms").strftime("%Y-%m-%d")
+
+            return pd.DataFrame(
+                {
+                    "Date": dates,
+                    "Open": bars["open"],
+                    "High": bars["high"],
+                    "Low": bars["low"],
+                    "Close": bars["close"],
+                    "Volume": bars["volume"],
+                }
+            )
 
         except Exception as e:
             error_msg = str(e)
@@ -96,20 +122,31 @@ class PolygonClient:
                 )
             else:
                 print(f"Error fetching aggregates for {ticker}: {e}")
-            return pd.DataFrame()
+            return None
 
 
 def update_ticker_data(
-    ticker: str, existing_csv_path: str, client: PolygonClient
+    ticker: str,
+    existing_csv_path: str,
+    client: PolygonClient,
+    parquet: bool = False,
+    full_rewrite: bool = False,
 ) -> bool:
     """
     Update ticker data with recent data from Polygon API (free tier compatible).
     Fetches recent data (last 2 years) instead of trying to backfill old historical data.
 
+    When the CSV already exists, only completed bars after its last date are
+    fetched and appended to the file (today's bar may still be forming, and
+    appended rows are never rewritten). A full rewrite re-fetches the whole
+    2 year window and rewrites the merged, de-duplicated and sorted file.
+
     Args:
         ticker: Stock symbol to update
         existing_csv_path: Path to existing CSV file
         client: Polygon API client
+        parquet: Also write a Parquet copy next to the CSV (requires pyarrow)
+        full_rewrite: Merge and rewrite the whole file instead of appending
 
     Returns:
         True if successful, False otherwise
@@ -119,6 +156,20 @@ def update_ticker_data(
     end_date = datetime.now()
     start_date = end_date - timedelta(days=730)  # 2 years back
 
+    last_date = None
+    if not full_rewrite and os.path.exists(existing_csv_path):
+        last_date = pd.read_csv(existing_csv_path, usecols=["Date"])["Date"].max()
+        if pd.isna(last_date):
+            last_date = None  # Header only, nothing to append to
+        else:
+            # Only fetch completed bars we don't have yet
+            next_date = datetime.strptime(last_date, "%Y-%m-%d") + timedelta(days=1)
+            start_date = max(start_date, next_date)
+            end_date -= timedelta(days=1)
+            if start_date.date() > end_date.date():
+                print(f"{ticker} is already up to date")
+                return True
+
     from_date = start_date.strftime("%Y-%m-%d")
     to_date = end_date.strftime("%Y-%m-%d")
 
@@ -126,26 +177,62 @@ def update_ticker_data(
 
     try:
         new_data = client.get_aggregates(ticker, from_date, to_date)
+        if new_data is None:
+            return False  # Request failed, already reported
 
-        if new_data.empty:
-            print(f"No data available for {ticker}")
-            return True
+        if last_date is not None:
+            if not new_data.empty:
+                new_data = new_data[new_data["Date"] > last_date]
 
-        # Load existing data if it exists
-        if os.path.exists(existing_csv_path):
-            existing_df = pd.read_csv(existing_csv_path)
-            # Combine with new data
-            combined_df = pd.concat([existing_df, new_data], ignore_index=True)
-        else:
-            combined_df = new_data
+            if new_data.empty:
+                print(f"No new data for {ticker}")
+                return True
 
-        # Remove duplicates and sort
-        combined_df = combined_df.drop_duplicates(subset=["Date"], keep="last")
-        combined_df = combined_df.sort_values("Date").reset_index(drop=True)
+            # Append in the existing file's column order, no rewrite needed
+            columns = pd.read_csv(existing_csv_path, nrows=0).columns
+            new_data.reindex(columns=columns).to_csv(
+                existing_csv_path, mode="a", header=False, index=False
+            )
+            print(f"Updated {ticker} with {len(new_data)} recent rows")
 
-        # Save back to CSV
-        combined_df.to_csv(existing_csv_path, index=False)
-        print(f"Updated {ticker} with {len(new_data)} recent rows")
+            combined_df = pd.read_csv(existing_csv_path) if parquet else None
+
+        else:
+            if new_data.empty:
+                print(
+                    f"Unable to retrieve recent data for {ticker} from Polygon API. "
+                    f"Manual download required from https://www.investing.com/"
+                )
+                return False
+
+            # Collect every frame first and combine them with a single concat
+            frames = [new_data]
+            if os.path.exists(existing_csv_path):
+                frames.insert(0, pd.read_csv(existing_csv_path))
+            combined_df = (
+                pd.concat(frames, ignore_index=True) if len(frames) > 1 else new_data
+            )
+
+            # Remove duplicates and sort
+            combined_df = combined_df.drop_duplicates(subset=["Date"], keep="last")
+            combined_df = combined_df.sort_values("Date").reset_index(drop=True)
+
+            # Save back to CSV
+            combined_df.to_csv(existing_csv_path, index=False)
+            print(f"Updated {ticker} with {len(new_data)} recent rows")
+
+        if parquet:
+            # Columnar copy with typed dates, much faster to load than the CSV
+            parquet_df = combined_df.assign(Date=pd.to_datetime(combined_df["Date"]))
+            # Imported CSVs can mix numbers with strings like "5.23M"
+            for column in parquet_df.columns.drop("Date"):
+                if parquet_df[column].dtype == object:
+                    parquet_df[column] = parquet_df[column].astype(str)
+
+            parquet_path = os.path.splitext(existing_csv_path)[0] + ".parquet"
+            parquet_df.to_parquet(
+                parquet_path, engine="pyarrow", compression="snappy", index=False
+            )
 
         return True
 
@@ -164,7 +251,10 @@ def update_ticker_data(
 
 def check_data_gaps(ticker: str, csv_path: str) -> tuple[bool, str]:
     """
-    Check for gaps between existing data and API availability.
+    Check that usable local data exists for a ticker.
+
+    API availability is not probed here; update_ticker_data reports it from
+    its own fetch, so each ticker costs a single API request.
 
     Returns:
         (has_gap, message)
@@ -172,82 +262,73 @@ def check_data_gaps(ticker: str, csv_path: str) -> tuple[bool, str]:
     if not os.path.exists(csv_path):
         return True, f"CSV file for {ticker} does not exist."
 
-    df = pd.read_csv(csv_path)
+    df = pd.read_csv(csv_path, nrows=1)
     if df.empty:
         return True, f"CSV file for {ticker} is empty."
 
-    last_date = datetime.strptime(df["Date"].max(), "%Y-%m-%d")
-
-    # Check if we can get recent data from Polygon (free tier compatible)
-    client = PolygonClient(POLYGON_API_KEY)
-    try:
-        # Test with recent dates that free tier supports
-        end_date = datetime.now()
-        start_date = end_date - timedelta(days=30)  # Last 30 days
-
-        test_data = client.get_aggregates(
-            ticker,
-            start_date.strftime("%Y-%m-%d"),
-            end_date.strftime("%Y-%m-%d"),
-            multiplier=1,
-            timespan="day",
-        )
-        if test_data.empty:
-            return (
-                True,
-                f"Unable to retrieve recent data for {ticker} from Polygon API. Manual download required from https://www.investing.com/",
-            )
-    except Exception as e:
-        return (
-            True,
-            f"Error accessing Polygon API for {ticker}: {e}. Manual download required from https://www.investing.com/",
-        )
-
     return False, ""
 
 
-def backfill_all_tickers(data_dir: str, tickers: list[str] = None) -> None:
+def backfill_all_tickers(
+    data_dir: str,
+    tickers: list[str] = None,
+    max_workers: int = 10,
+    parquet: bool = False,
+    full_rewrite: bool = False,
+) -> None:
     """
     Backfill all tickers in the data directory.
 
+    Tickers are processed concurrently, since each one is dominated by
+    waiting on Polygon API round-trips.
+
     Args:
         data_dir: Path to data directory
         tickers: List of tickers to backfill (if None, finds all CSV files)
+        max_workers: Maximum number of tickers fetched at the same time
+        parquet: Also write a Parquet copy of each updated CSV
+        full_rewrite: Merge and rewrite each CSV instead of appending new rows
     """
     if not POLYGON_API_KEY:
         print("Error: POLYGON_API_KEY not found in environment variables")
         return
 
-    client = PolygonClient(POLYGON_API_KEY)
+    # One client shared by every ticker so connections are reused
+    client = PolygonClient(POLYGON_API_KEY, max_connections=max_workers)
 
     real_tickers_dir = os.path.join(data_dir, "real_tickers")
 
     if tickers is None:
         # Find all CSV files
         if os.path.exists(real_tickers_dir):
-            tickers = [
-                f.replace(".csv", "")
-                for f in os.listdir(real_tickers_dir)
-                if f.endswith(".csv")
-            ]
+            with os.scandir(real_tickers_dir) as entries:
+                tickers = [
+                    entry.name[: -len(".csv")]
+                    for entry in entries
+                    if entry.name.endswith(".csv") and entry.is_file()
+                ]
         else:
             print(f"Directory {real_tickers_dir} does not exist")
             return
 
-    for ticker in tickers:
+    def process_ticker(ticker: str) -> None:
         csv_path = os.path.join(real_tickers_dir, f"{ticker}.csv")
 
         # Check for gaps first
         has_gap, message = check_data_gaps(ticker, csv_path)
         if has_gap:
             print(f"Gap detected for {ticker}: {message}")
-            continue
+            return
 
         # Update with recent data
-        success = update_ticker_data(ticker, csv_path, client)
+        success = update_ticker_data(ticker, csv_path, client, parquet, full_rewrite)
         if not success:
             print(f"Failed to update {ticker}")
 
+    # The Polygon SDK is synchronous, so overlap requests with threads
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        list(executor.map(process_ticker, tickers))
+
 
 if __name__ == "__main__":
     import argparse
@@ -264,7 +345,30 @@ if __name__ == "__main__":
     parser.add_argument(
         "--tickers", nargs="*", help="Specific tickers to backfill (default: all)"
     )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=10,
+        help="Maximum number of tickers fetched concurrently (default: 10)",
+    )
+    parser.add_argument(
+        "--parquet",
+        action="store_true",
+        help="Also write a Parquet copy of each ticker's data (requires pyarrow)",
+    )
+
+    parser.add_argument(
+        "--full-rewrite",
+        action="store_true",
+        help="Re-fetch the last 2 years and rewrite each file instead of appending",
+    )
 
     args = parser.parse_args()
 
-    backfill_all_tickers(args.data_dir, args.tickers)
+    backfill_all_tickers(
+        args.data_dir,
+        args.tickers,
+        args.max_workers,
+        args.parquet,
+        args.full_rewrite,
+    )
@@ -3,31 +3,109 @@
 Visualization tools for trading strategy performance.
 """
 
+import json
+import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import os
+from functools import lru_cache
 from typing import List, Optional
 
+try:
+    import pyarrow  # noqa: F401
+
+    # pyarrow parses CSV files on multiple threads
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
+
+# Prices only need float32 precision for plotting. Portfolio values stay
+# float64 since summaries print them to the cent, and Volume is left alone
+# because imported data mixes numbers with strings like "5.23M".
+PRICE_DTYPES = {
+    "Open": "float32",
+    "High": "float32",
+    "Low": "float32",
+    "Close": "float32",
+}
+
+# Load plotly.js from the CDN instead of inlining ~3MB into every chart, and
+# skip re-validating figures that were built from validated traces. Figure
+# JSON is encoded with orjson whenever it is installed (plotly's "auto" engine).
+HTML_WRITE_OPTIONS = {"include_plotlyjs": "cdn", "full_html": True, "validate": False}
+
+
+# Static charts of longer series are reduced to the minimum and maximum of
+# each bucket, which keeps every peak and trough visible at screen resolution
+STATIC_PLOT_MAX_POINTS = 10_000
+STATIC_PLOT_BUCKETS = 2_000
+
+
+def _min_max_downsample(
+    x: np.ndarray, y: np.ndarray, num_buckets: int = STATIC_PLOT_BUCKETS
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Downsample a series to the min and max point of each bucket.
+
+    Args:
+        x: X values (dates)
+        y: Y values
+        num_buckets: Number of equal-width buckets
+
+    Returns:
+        Tuple of (x, y) with at most 2 * num_buckets + 2 points, in order
+    """
+    num_points = len(y)
+    bucket_size = -(-num_points // num_buckets)  # Ceiling division
+    num_buckets = -(-num_points // bucket_size)
+
+    # Pad to whole buckets; NaN never wins the min or max
+    padded = np.full(num_buckets * bucket_size, np.nan)
+    padded[:num_points] = y
+    buckets = padded.reshape(num_buckets, bucket_size)
+
+    offsets = np.arange(num_buckets) * bucket_size
+    min_idx = offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    max_idx = offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+
+    keep = np.unique(np.concatenate(([0, num_points - 1], min_idx, max_idx)))
+    keep = keep[keep < num_points]
+    return x[keep], y[keep]
+
+
+@lru_cache(maxsize=32)
+def _load_data_cached(path: str, mtime: float) -> pd.DataFrame:
+    """Load CSV or Parquet data, cached per (path, modification time)."""
+    if path.endswith(".parquet"):
+        # Parquet stores Date as datetime64, so there is nothing to parse.
+        # Memory-mapping lets the OS page cache hold the file instead of a
+        # private read buffer per load.
+        df = pd.read_parquet(path, memory_map=True)
+        return df.astype(
+            {column: dtype for column, dtype in PRICE_DTYPES.items() if column in df}
+        )
+
+    return pd.read_csv(
+        path, dtype=PRICE_DTYPES, parse_dates=["Date"], engine=CSV_ENGINE
+    )
+
 
 class PerformanceVisualizer:
     """Creates visualizations for strategy performance."""
 
-    def __init__(self):
-        self.data_cache = {}
-
     def load_csv_data(self, csv_path: str) -> pd.DataFrame:
-        """Load and cache CSV data."""
-        if csv_path not in self.data_cache:
-            if os.path.exists(csv_path):
-                df = pd.read_csv(csv_path)
-                df["Date"] = pd.to_datetime(df["Date"])
-                self.data_cache[csv_path] = df
-            else:
-                raise FileNotFoundError(f"CSV file not found: {csv_path}")
+        """
+        Load and cache CSV data (or Parquet data for .parquet paths).
+
+        The returned DataFrame is shared between callers and must not be
+        modified in place; filtering it returns a new object.
+        """
+        if not os.path.exists(csv_path):
+            raise FileNotFoundError(f"CSV file not found: {csv_path}")
 
-        return self.data_cache[csv_path].copy()
+        return _load_data_cached(csv_path, os.path.getmtime(csv_path))
 
     def normalize_prices(
         self, df: pd.DataFrame, start_value: float = 100.0
@@ -38,7 +116,9 @@ class PerformanceVisualizer:
 
         first_price = df["Close"].iloc[0]
         if first_price == 0:
-            return pd.Series([start_value] * len(df), index=df.index)
+            return pd.Series(
+                np.full(len(df), start_value, dtype=np.float32), index=df.index
+            )
 
         return (df["Close"] / first_price) * start_value
 
@@ -62,23 +142,25 @@ class PerformanceVisualizer:
             end_date: End date filter (YYYY-MM-DD)
             normalize: Whether to normalize all series to same starting value
             interactive: Whether to create interactive plotly chart
+            save_path: Path to save the chart to (HTML when interactive, an
+                image such as PNG otherwise) instead of showing it
         """
-        if labels is None:
-            labels = []
-            for path in csv_paths:
-                df = self.load_csv_data(path)
-                if "Strategy_Name" in df.columns and not df.empty:
-                    labels.append(df["Strategy_Name"].iloc[0])
-                else:
-                    labels.append(os.path.basename(path).replace(".csv", ""))
-
-        if len(csv_paths) != len(labels):
+        if labels is not None and len(csv_paths) != len(labels):
             raise ValueError("Number of CSV paths must match number of labels")
 
+        # Load each file once, deriving its label from the same frame
         data_frames = []
-        for path in csv_paths:
+        resolved_labels = []
+        for i, path in enumerate(csv_paths):
             df = self.load_csv_data(path)
 
+            if labels is not None:
+                resolved_labels.append(labels[i])
+            elif "Strategy_Name" in df.columns and not df.empty:
+                resolved_labels.append(df["Strategy_Name"].iloc[0])
+            else:
+                resolved_labels.append(os.path.basename(path).replace(".csv", ""))
+
             # Filter date range
             if start_date:
                 df = df[df["Date"] >= start_date]
@@ -90,10 +172,10 @@ class PerformanceVisualizer:
         # Create plot
         if interactive:
             self._create_interactive_plot(
-                data_frames, labels, normalize, save_path, csv_paths
+                data_frames, resolved_labels, normalize, save_path, csv_paths
             )
         else:
-            self._create_static_plot(data_frames, labels, normalize)
+            self._create_static_plot(data_frames, resolved_labels, normalize, save_path)
 
     def _create_interactive_plot(
         self,
@@ -110,12 +192,14 @@ class PerformanceVisualizer:
         portfolio_data = []
         daily_returns_data = []
         cumulative_returns_data = []
+        normalized_prices_by_index = {}  # Reused by the performance summary
 
         for i, (df, label) in enumerate(zip(data_frames, labels)):
             if df.empty:
                 continue
 
-            x_data = df["Date"]
+            # Plain numpy arrays let plotly skip per-trace pandas conversion
+            x_data = df["Date"].to_numpy(dtype="datetime64[ms]")
 
             if "Portfolio_Value" in df.columns:
                 # Strategy results CSV
@@ -140,6 +224,7 @@ class PerformanceVisualizer:
                 # Price data CSV
                 if normalize:
                     normalized_prices = self.normalize_prices(df, 100.0)
+                    normalized_prices_by_index[i] = normalized_prices
 
                     # Calculate daily returns for normalized data
                     daily_returns = normalized_prices.pct_change() * 100
@@ -170,10 +255,11 @@ class PerformanceVisualizer:
         }
 
         # Add portfolio value traces (visible by default)
+        # Values keep their own dtype (portfolio values need float64 for cents)
         for i, (x_data, y_data, label) in enumerate(portfolio_data):
             trace = go.Scatter(
                 x=x_data,
-                y=y_data,
+                y=y_data.to_numpy(),
                 mode="lines",
                 name=label,
                 hovertemplate=f"{label}<br>Date: %{{x}}<br>Value: %{{y:.2f}}<extra></extra>",
@@ -185,10 +271,11 @@ class PerformanceVisualizer:
             visible_traces["cumulative_returns"].append(False)
 
         # Add daily returns traces (hidden by default)
+        # Percentages are plotted as float32, halving their encoded size
         for i, (x_data, y_data, label) in enumerate(daily_returns_data):
             trace = go.Scatter(
                 x=x_data,
-                y=y_data,
+                y=y_data.to_numpy(dtype=np.float32),
                 mode="lines",
                 name=f"{label} (Daily Returns)",
                 hovertemplate=f"{label}<br>Date: %{{x}}<br>Daily Return: %{{y:.2f}}%<extra></extra>",
@@ -200,7 +287,7 @@ class PerformanceVisualizer:
         for i, (x_data, y_data, label) in enumerate(cumulative_returns_data):
             trace = go.Scatter(
                 x=x_data,
-                y=y_data,
+                y=y_data.to_numpy(dtype=np.float32),
                 mode="lines",
                 name=f"{label} (Cumulative Returns)",
                 hovertemplate=f"{label}<br>Date: %{{x}}<br>Cumulative Return: %{{y:.2f}}%<extra></extra>",
@@ -331,7 +418,7 @@ class PerformanceVisualizer:
                 print(f"{label}: ${final_value:,.2f} ({total_return:+.2f}%)")
             elif "Close" in df.columns:
                 if normalize:
-                    normalized = self.normalize_prices(df, 100.0)
+                    normalized = normalized_prices_by_index[i]
                     final_value = normalized.iloc[-1]
                     total_return = (final_value - 100.0) / 100.0 * 100
                     print(f"{label}: {final_value:.2f} ({total_return:+.2f}%)")
@@ -343,7 +430,7 @@ class PerformanceVisualizer:
 
         # Save as HTML file
         if save_path:
-            fig.write_html(save_path)
+            fig.write_html(save_path, **HTML_WRITE_OPTIONS)
             print(f"\nChart saved to: {save_path}")
         else:
             # Try to show the plot, but save as HTML if it fails
@@ -352,13 +439,17 @@ class PerformanceVisualizer:
             except Exception as e:
                 print(f"Could not display interactive plot: {e}")
                 temp_path = f"visualizations/performance_chart_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.html"
-                fig.write_html(temp_path)
+                fig.write_html(temp_path, **HTML_WRITE_OPTIONS)
                 print(f"Chart saved to: {temp_path}")
 
     def _create_static_plot(
-        self, data_frames: List[pd.DataFrame], labels: List[str], normalize: bool
+        self,
+        data_frames: List[pd.DataFrame],
+        labels: List[str],
+        normalize: bool,
+        save_path: str = None,
     ) -> None:
-        """Create static matplotlib chart."""
+        """Create static matplotlib chart, saved to save_path if given."""
         plt.figure(figsize=(12, 8))
 
         for i, (df, label) in enumerate(zip(data_frames, labels)):
@@ -366,19 +457,28 @@ class PerformanceVisualizer:
                 continue
 
             if "Portfolio_Value" in df.columns:
-                plt.plot(df["Date"], df["Portfolio_Value"], label=label, linewidth=2)
+                y_data = df["Portfolio_Value"]
                 title = "Portfolio Value Over Time"
                 ylabel = "Portfolio Value ($)"
             elif "Close" in df.columns:
                 if normalize:
-                    normalized = self.normalize_prices(df, 100.0)
-                    plt.plot(df["Date"], normalized, label=label, linewidth=2)
+                    y_data = self.normalize_prices(df, 100.0)
                     title = "Normalized Performance (Starting at $100)"
                     ylabel = "Normalized Value"
                 else:
-                    plt.plot(df["Date"], df["Close"], label=label, linewidth=2)
+                    y_data = df["Close"]
                     title = "Price Over Time"
                     ylabel = "Price ($)"
+            else:
+                continue
+
+            x_values = df["Date"].to_numpy()
+            y_values = y_data.to_numpy(dtype=np.float64)
+            if len(y_values) > STATIC_PLOT_MAX_POINTS:
+                x_values, y_values = _min_max_downsample(x_values, y_values)
+
+            # Rasterized lines keep saved PDF/SVG charts small for long series
+            plt.plot(x_values, y_values, label=label, linewidth=2, rasterized=True)
 
         plt.title(title, fontsize=16)
         plt.xlabel("Date", fontsize=12)
@@ -387,7 +487,14 @@ class PerformanceVisualizer:
         plt.grid(True, alpha=0.3)
         plt.xticks(rotation=45)
         plt.tight_layout()
-        plt.show()
+
+        if save_path:
+            # Rendering straight to a file needs no interactive backend
+            plt.savefig(save_path, dpi=100)
+            plt.close()
+            print(f"\nChart saved to: {save_path}")
+        else:
+            plt.show()
 
     def compare_strategies(
         self,
@@ -465,41 +572,33 @@ class PerformanceVisualizer:
             print("No allocation data found")
             return
 
-        # Parse allocation JSON
-        allocations = []
-        dates = []
-        assets = set()
-
-        for _, row in df.iterrows():
+        # Parse allocation JSON, skipping rows that are not valid allocations
+        def parse_allocation(value):
             try:
-                alloc = eval(row["Allocation"])  # Use eval for JSON stored as string
-                if isinstance(alloc, dict):
-                    allocations.append(alloc)
-                    dates.append(row["Date"])
-                    assets.update(alloc.keys())
-            except:
-                continue
+                alloc = json.loads(value)
+            except (TypeError, ValueError):
+                return None
+            return alloc if isinstance(alloc, dict) else None
+
+        parsed = df["Allocation"].map(parse_allocation)
+        valid = parsed.notna()
 
-        if not allocations:
+        if not valid.any():
             print("No valid allocation data found")
             return
 
-        # Create stacked area chart
-        assets = sorted(list(assets))
-        alloc_matrix = []
+        # One column per asset, 0 where the asset is not allocated
+        alloc_df = pd.json_normalize(parsed[valid].tolist()).fillna(0)
+        dates = df.loc[valid, "Date"].to_numpy()
 
-        for alloc in allocations:
-            row = [alloc.get(asset, 0) for asset in assets]
-            alloc_matrix.append(row)
-
-        # Create plotly figure
+        # Create stacked area chart
         fig = go.Figure()
 
-        for i, asset in enumerate(assets):
+        for asset in sorted(alloc_df.columns):
             fig.add_trace(
                 go.Scatter(
                     x=dates,
-                    y=[row[i] for row in alloc_matrix],
+                    y=alloc_df[asset].to_numpy(),
                     mode="lines",
                     stackgroup="one",
                     name=asset,